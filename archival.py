@@ -0,0 +1,179 @@
+# sentracare-be-patient/archival.py
+# Memindahkan rekam medis & resep lama dari tabel utama (hot) ke tabel arsip (cold)
+# secara bertahap, agar pembacaan default hanya menyentuh data terbaru.
+#
+# Job ini aman dijalankan dari beberapa worker/replika: di MySQL setiap putaran
+# mengambil named lock (GET_LOCK), sehingga hanya satu instance yang memindahkan
+# data pada satu waktu; instance lain melewati putaran tersebut.
+import asyncio
+import os
+from datetime import datetime, time, timedelta
+from sqlalchemy import delete, exists, func, insert, literal, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal, engine
+from models import MedicalRecord, Prescription, ArchivedMedicalRecord, ArchivedPrescription, ARCHIVE_INDEXES
+
+ARCHIVE_HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", "730"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))  # 0 = nonaktif
+ARCHIVE_LOCK_NAME = "sentracare_patient_archival"
+
+RECORD_COLUMNS = [c.name for c in MedicalRecord.__table__.columns]
+PRESCRIPTION_COLUMNS = [c.name for c in Prescription.__table__.columns]
+
+def _move_prescriptions(db, prescription_ids: list, archived_at: datetime):
+    if not prescription_ids:
+        return
+    src = Prescription.__table__
+    db.execute(
+        insert(ArchivedPrescription.__table__).from_select(
+            PRESCRIPTION_COLUMNS + ["archived_at"],
+            select(*[src.c[c] for c in PRESCRIPTION_COLUMNS], literal(archived_at))
+            .where(src.c.id.in_(prescription_ids)),
+        )
+    )
+    db.execute(delete(src).where(src.c.id.in_(prescription_ids)))
+
+def _move_records(db, record_ids: list, archived_at: datetime):
+    src = MedicalRecord.__table__
+    db.execute(
+        insert(ArchivedMedicalRecord.__table__).from_select(
+            RECORD_COLUMNS + ["archived_at"],
+            select(*[src.c[c] for c in RECORD_COLUMNS], literal(archived_at))
+            .where(src.c.id.in_(record_ids)),
+        )
+    )
+    db.execute(delete(src).where(src.c.id.in_(record_ids)))
+
+def _sync_auto_increment(conn):
+    # Naikkan AUTO_INCREMENT tabel utama di atas MAX(id) arsip, supaya id yang
+    # sudah diarsipkan tidak dipakai ulang (mis. setelah restart MySQL).
+    if conn.dialect.name != "mysql":
+        return
+    for hot, archived in ((MedicalRecord, ArchivedMedicalRecord), (Prescription, ArchivedPrescription)):
+        max_archived = conn.execute(select(func.max(archived.id))).scalar()
+        max_hot = conn.execute(select(func.max(hot.id))).scalar() or 0
+        if max_archived is not None and max_archived >= max_hot:
+            conn.execute(text(f"ALTER TABLE {hot.__tablename__} AUTO_INCREMENT = {max_archived + 1}"))
+    conn.commit()
+
+def prepare_archive_tables():
+    """Buat index arsip yang belum ada dan sinkronkan AUTO_INCREMENT; dipanggil saat startup."""
+    for index in ARCHIVE_INDEXES:
+        index.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        _sync_auto_increment(conn)
+
+def _select_record_ids(db, cutoff, batch_size: int) -> list:
+    cutoff_at = datetime.combine(cutoff, time.min)
+    # Rekam medis baru (created_at setelah cutoff) atau yang baru diberi resep
+    # tetap di tabel utama walaupun visit_date yang diinput sudah lama.
+    recent_prescription = exists().where(
+        Prescription.record_id == MedicalRecord.id,
+        Prescription.created_at >= cutoff_at,
+    )
+    query = (
+        select(MedicalRecord.id)
+        .where(MedicalRecord.visit_date < cutoff)
+        .where(or_(MedicalRecord.created_at == None, MedicalRecord.created_at < cutoff_at))
+        .where(~recent_prescription)
+    )
+    return db.execute(query.order_by(MedicalRecord.id).limit(batch_size)).scalars().all()
+
+def _select_prescription_ids(db, cutoff, batch_size: int) -> list:
+    query = (
+        select(Prescription.id)
+        .where(Prescription.record_id == None)
+        .where(Prescription.created_at < datetime.combine(cutoff, time.min))
+    )
+    return db.execute(query.order_by(Prescription.id).limit(batch_size)).scalars().all()
+
+def _archive_records(db, record_ids: list):
+    prescription_ids = db.execute(
+        select(Prescription.id).where(Prescription.record_id.in_(record_ids))
+    ).scalars().all()
+
+    archived_at = datetime.utcnow()
+    _move_prescriptions(db, prescription_ids, archived_at)
+    # Jika ada resep baru yang ditautkan di tengah proses, FK akan menolak delete
+    # dan batch di-rollback; putaran berikutnya melewati rekam medis tersebut
+    # karena resepnya kini baru.
+    _move_records(db, record_ids, archived_at)
+    db.commit()
+
+def _archive_prescriptions(db, prescription_ids: list):
+    _move_prescriptions(db, prescription_ids, datetime.utcnow())
+    db.commit()
+
+def archive_record_batch(db, cutoff, batch_size: int) -> int:
+    """Arsipkan satu batch rekam medis lama (visit_date & created_at < cutoff) beserta resepnya."""
+    record_ids = _select_record_ids(db, cutoff, batch_size)
+    if record_ids:
+        _archive_records(db, record_ids)
+    return len(record_ids)
+
+def archive_prescription_batch(db, cutoff, batch_size: int) -> int:
+    """Arsipkan satu batch resep tanpa rekam medis yang dibuat sebelum cutoff."""
+    prescription_ids = _select_prescription_ids(db, cutoff, batch_size)
+    if prescription_ids:
+        _archive_prescriptions(db, prescription_ids)
+    return len(prescription_ids)
+
+def _run_batches(db, label: str, select_ids, archive_ids, cutoff, batch_size: int) -> int:
+    moved = 0
+    while True:
+        ids = select_ids(db, cutoff, batch_size)
+        if not ids:
+            break
+        try:
+            archive_ids(db, ids)
+        except IntegrityError as e:
+            db.rollback()
+            print(f"Error archiving {label} batch {ids[0]}..{ids[-1]}, retrying next run: {e.orig}")
+            break
+        moved += len(ids)
+        if len(ids) < batch_size:
+            break
+    return moved
+
+def run_archival(horizon_days: int = ARCHIVE_HORIZON_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> dict:
+    if batch_size <= 0:
+        raise ValueError("ARCHIVE_BATCH_SIZE harus lebih dari 0")
+    if horizon_days < 0:
+        raise ValueError("ARCHIVE_HORIZON_DAYS tidak boleh negatif")
+
+    cutoff = datetime.utcnow().date() - timedelta(days=horizon_days)
+    moved = {"records": 0, "prescriptions": 0}
+
+    with engine.connect() as lock_conn:
+        use_lock = lock_conn.dialect.name == "mysql"
+        if use_lock and lock_conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": ARCHIVE_LOCK_NAME}).scalar() != 1:
+            return moved  # instance lain sedang menjalankan arsip
+
+        _sync_auto_increment(lock_conn)
+        db = SessionLocal()
+        try:
+            moved["records"] = _run_batches(db, "record", _select_record_ids, _archive_records, cutoff, batch_size)
+            moved["prescriptions"] = _run_batches(db, "prescription", _select_prescription_ids, _archive_prescriptions, cutoff, batch_size)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+            if use_lock:
+                lock_conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": ARCHIVE_LOCK_NAME})
+    return moved
+
+async def archive_loop():
+    while ARCHIVE_INTERVAL_SECONDS > 0:
+        try:
+            moved = await run_in_threadpool(run_archival)
+            if moved["records"] or moved["prescriptions"]:
+                print(f"Archived {moved['records']} records, {moved['prescriptions']} prescriptions")
+        except Exception as e:
+            print(f"Error running archival: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+if __name__ == "__main__":
+    print(run_archival())
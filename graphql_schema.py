@@ -5,9 +5,10 @@ from fastapi import Request
 import strawberry
 from typing import List, Optional, Dict, Any
 from strawberry.fastapi import GraphQLRouter
+from strawberry.types import Info
 from sqlalchemy.orm import Session
 from database import SessionLocal
-from models import Patient, MedicalRecord, Prescription
+from models import Patient, MedicalRecord, Prescription, ArchivedMedicalRecord, ArchivedPrescription
 # from auth import decode_token 
 
 # Definisi JSON Scalar
@@ -18,6 +19,8 @@ JSON = strawberry.scalar(
     parse_value=lambda v: v, 
 )
 
+HISTORY_MAX_LIMIT = 100
+
 @strawberry.type
 class VitalSignsType:
     blood_pressure: Optional[str] = None
@@ -69,9 +72,36 @@ class PatientType:
     gender: Optional[str] = None
     age: Optional[int] = None
     tipe_layanan: Optional[str] = None
-    records: List[MedicalRecordType]
+    records: List[MedicalRecordType] # Hanya data terbaru (tabel utama)
     prescriptions: List[PrescriptionType]
 
+    # Data lama yang sudah dipindahkan ke tabel arsip, diambil per halaman
+    @strawberry.field
+    def history(self, info: Info, limit: int = 20, offset: int = 0) -> List[MedicalRecordType]:
+        db: Session = info.context["db"]
+        rows = (
+            db.query(ArchivedMedicalRecord)
+            .filter(ArchivedMedicalRecord.patient_id == self.id)
+            .order_by(ArchivedMedicalRecord.visit_date.desc(), ArchivedMedicalRecord.id.desc())
+            .offset(max(offset, 0))
+            .limit(min(max(limit, 0), HISTORY_MAX_LIMIT))
+            .all()
+        )
+        return [to_record_type(r) for r in rows]
+
+    @strawberry.field
+    def prescription_history(self, info: Info, limit: int = 20, offset: int = 0) -> List[PrescriptionType]:
+        db: Session = info.context["db"]
+        rows = (
+            db.query(ArchivedPrescription)
+            .filter(ArchivedPrescription.patient_id == self.id)
+            .order_by(ArchivedPrescription.created_at.desc(), ArchivedPrescription.id.desc())
+            .offset(max(offset, 0))
+            .limit(min(max(limit, 0), HISTORY_MAX_LIMIT))
+            .all()
+        )
+        return [to_prescription_type(pr) for pr in rows]
+
 # --- Helper Functions ---
 def to_record_type(r: MedicalRecord) -> MedicalRecordType:
     vs = r.vital_signs or {}
@@ -127,13 +157,13 @@ def to_patient_type(p: Patient) -> PatientType:
 @strawberry.type
 class Query:
     @strawberry.field
-    def patient_by_email(self, info, email: str) -> Optional[PatientType]:
+    def patient_by_email(self, info: Info, email: str) -> Optional[PatientType]:
         db = info.context["db"]
         p = db.query(Patient).filter(Patient.email == email).first()
         return to_patient_type(p) if p else None
 
     @strawberry.field
-    def patients_by_doctor(self, info, doctor_email: str) -> List[PatientType]:
+    def patients_by_doctor(self, info: Info, doctor_email: str) -> List[PatientType]:
         db: Session = info.context["db"]
         patients = db.query(Patient).filter(Patient.doctor_email == doctor_email).all()
         return [to_patient_type(p) for p in patients]
@@ -141,13 +171,21 @@ class Query:
 @strawberry.type
 class Mutation:
     @strawberry.field
-    def delete_record(self, info, record_id: int) -> str:
+    def delete_record(self, info: Info, record_id: int) -> str:
         db: Session = info.context["db"]
         record = db.query(MedicalRecord).filter(MedicalRecord.id == record_id).first()
         if record:
             db.delete(record)
             db.commit()
             return "Success"
+
+        # Rekam medis yang sudah diarsipkan (tampil di field history)
+        archived = db.query(ArchivedMedicalRecord).filter(ArchivedMedicalRecord.id == record_id).first()
+        if archived:
+            db.query(ArchivedPrescription).filter(ArchivedPrescription.record_id == record_id).delete(synchronize_session=False)
+            db.delete(archived)
+            db.commit()
+            return "Success"
         return "Not Found"
 
 async def get_context(): 
@@ -1,4 +1,5 @@
 # sentracare-be-patient/main.py
+import asyncio
 from datetime import datetime
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,13 +8,15 @@ from sqlalchemy import or_
 from typing import List
 import httpx
 from database import engine, SessionLocal, Base
-from models import MedicalRecord, Patient, Prescription
+from models import MedicalRecord, Patient, Prescription, ArchivedMedicalRecord, ArchivedPrescription
 from schemas import PatientWithRecords, PrescriptionCreate, PrescriptionResponse
 from auth import require_role
 from schemas import MedicalRecordCreate, MedicalRecordResponse
 from graphql_schema import graphql_app 
+from archival import archive_loop, prepare_archive_tables
 
 Base.metadata.create_all(bind=engine)
+prepare_archive_tables()
 
 app = FastAPI(
     title="Sentracare Patient Service",
@@ -30,6 +33,17 @@ app = FastAPI(
 #     allow_headers=["*"],
 # )
 
+# === Job arsip rekam medis lama (lihat archival.py) ===
+@app.on_event("startup")
+async def start_archival():
+    app.state.archival_task = asyncio.create_task(archive_loop())
+
+@app.on_event("shutdown")
+async def stop_archival():
+    task = getattr(app.state, "archival_task", None)
+    if task:
+        task.cancel()
+
 def get_db():
     db = SessionLocal()
     try:
@@ -210,6 +224,18 @@ def add_prescription(
     doctor_username = claims.get("sub")
     doctor_full_name = claims.get("full_name") or claims.get("sub")
 
+    # Rekam medis / resep yang sudah diarsipkan tidak bisa ditautkan atau diubah lagi
+    if data.record_id:
+        if not db.query(MedicalRecord.id).filter(MedicalRecord.id == data.record_id).first():
+            if db.query(ArchivedMedicalRecord.id).filter(ArchivedMedicalRecord.id == data.record_id).first():
+                raise HTTPException(status_code=409, detail="Rekam medis sudah diarsipkan")
+            raise HTTPException(status_code=404, detail="Rekam medis tidak ditemukan")
+
+    if data.prescription_number and db.query(ArchivedPrescription.id).filter(
+        ArchivedPrescription.prescription_number == data.prescription_number
+    ).first():
+        raise HTTPException(status_code=409, detail="Resep dengan nomor ini sudah diarsipkan")
+
     existing_prescription = db.query(Prescription).filter(
         or_(
             Prescription.prescription_number == data.prescription_number,
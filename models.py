@@ -1,5 +1,5 @@
 # sentracare-be-patient/models.py
-from sqlalchemy import JSON, Column, Date, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import JSON, Column, Date, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -67,3 +67,48 @@ class Prescription(Base):
 # Tambahkan relasi di Patient dan MedicalRecord
 Patient.prescriptions = relationship("Prescription", back_populates="patient", cascade="all, delete-orphan")
 MedicalRecord.prescriptions = relationship("Prescription", back_populates="record", cascade="all, delete-orphan")
+
+# Index untuk query job arsip. create_all tidak menambah index ke tabel yang
+# sudah ada, jadi archival.prepare_archive_tables() membuatnya saat startup.
+ARCHIVE_INDEXES = [
+    Index("ix_medical_records_visit_date_created_at", MedicalRecord.visit_date, MedicalRecord.created_at),
+    Index("ix_prescriptions_created_at", Prescription.created_at),
+]
+
+# Tabel arsip (cold storage) untuk data lama yang dipindahkan oleh archival.py.
+# Kolom sama dengan tabel utama dan id asli dipertahankan. Agar id tidak bentrok,
+# archival.py menjaga AUTO_INCREMENT tabel utama tetap di atas MAX(id) arsip
+# (MySQL dapat memakai ulang auto-increment setelah restart).
+class ArchivedMedicalRecord(Base):
+    __tablename__ = "archived_medical_records"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), index=True, nullable=False)
+    booking_id = Column(Integer, nullable=True)
+    doctor_username = Column(String(50), nullable=False)
+    doctor_full_name = Column(String(100), nullable=True)
+    visit_date = Column(Date, nullable=False)
+    visit_type = Column(String(50), nullable=False)
+    diagnosis = Column(Text, nullable=False)
+    treatment = Column(Text, nullable=False)
+    vital_signs = Column(JSON, nullable=True)
+    extended_data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class ArchivedPrescription(Base):
+    __tablename__ = "archived_prescriptions"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), index=True, nullable=False)
+    record_id = Column(Integer, index=True, nullable=True)  # id di archived_medical_records
+    doctor_name = Column(String(100), nullable=False)
+    doctor_username = Column(String(50), nullable=False)
+    medicines = Column(JSON, nullable=False)
+    instructions = Column(Text, nullable=True)
+    prescription_number = Column(String(50), nullable=True)
+    created_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,162 @@
+# sentracare-be-patient/test_archival.py
+import os
+import tempfile
+from datetime import date, datetime
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test_archival.db")
+
+import pytest
+from sqlalchemy import inspect
+from database import Base, SessionLocal, engine
+from models import Patient, MedicalRecord, Prescription, ArchivedMedicalRecord, ArchivedPrescription, ARCHIVE_INDEXES
+from archival import archive_record_batch, archive_prescription_batch, prepare_archive_tables, run_archival
+from graphql_schema import schema
+
+OLD = datetime(2015, 1, 1)
+CUTOFF = date(2020, 1, 1)
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def add_patient(db):
+    patient = Patient(full_name="Pasien", email="pasien@example.com", phone_number="08123")
+    db.add(patient)
+    db.commit()
+    return patient
+
+def add_record(db, patient, visit_date, created_at=OLD):
+    record = MedicalRecord(
+        patient_id=patient.id,
+        doctor_username="dokter",
+        visit_date=visit_date,
+        visit_type="Kontrol",
+        diagnosis="Diagnosa",
+        treatment="Terapi",
+        created_at=created_at,
+    )
+    db.add(record)
+    db.commit()
+    return record
+
+def add_prescription(db, patient, record=None, created_at=OLD):
+    prescription = Prescription(
+        patient_id=patient.id,
+        record_id=record.id if record else None,
+        doctor_name="Dokter",
+        doctor_username="dokter",
+        medicines=[{"name": "Paracetamol"}],
+        created_at=created_at,
+    )
+    db.add(prescription)
+    db.commit()
+    return prescription
+
+def test_archive_record_batch_moves_records_with_prescriptions(db):
+    patient = add_patient(db)
+    old_record = add_record(db, patient, date(2016, 5, 1))
+    new_record = add_record(db, patient, date(2024, 5, 1), created_at=datetime.utcnow())
+    old_prescription = add_prescription(db, patient, old_record)
+    old_record_id, new_record_id, old_prescription_id = old_record.id, new_record.id, old_prescription.id
+
+    assert archive_record_batch(db, CUTOFF, 10) == 1
+
+    assert [r.id for r in db.query(MedicalRecord)] == [new_record_id]
+    assert [r.id for r in db.query(ArchivedMedicalRecord)] == [old_record_id]
+    assert db.query(Prescription).count() == 0
+    archived = db.query(ArchivedPrescription).one()
+    assert archived.id == old_prescription_id
+    assert archived.record_id == old_record_id
+    assert archived.archived_at is not None
+
+def test_archive_record_batch_respects_batch_size(db):
+    patient = add_patient(db)
+    for year in range(2010, 2015):
+        add_record(db, patient, date(year, 1, 1))
+
+    assert archive_record_batch(db, CUTOFF, 2) == 2
+    assert db.query(ArchivedMedicalRecord).count() == 2
+    assert db.query(MedicalRecord).count() == 3
+
+def test_archive_record_batch_keeps_recently_created_records(db):
+    patient = add_patient(db)
+    add_record(db, patient, date(2016, 5, 1), created_at=datetime.utcnow())
+
+    assert archive_record_batch(db, CUTOFF, 10) == 0
+    assert db.query(MedicalRecord).count() == 1
+
+def test_archive_record_batch_keeps_records_with_recent_prescriptions(db):
+    patient = add_patient(db)
+    record = add_record(db, patient, date(2016, 5, 1))
+    add_prescription(db, patient, record, created_at=datetime.utcnow())
+
+    assert archive_record_batch(db, CUTOFF, 10) == 0
+    assert db.query(MedicalRecord).count() == 1
+    assert db.query(Prescription).count() == 1
+    assert db.query(ArchivedPrescription).count() == 0
+
+def test_archive_prescription_batch_moves_standalone_prescriptions(db):
+    patient = add_patient(db)
+    record = add_record(db, patient, date(2024, 5, 1), created_at=datetime.utcnow())
+    linked_id = add_prescription(db, patient, record).id
+    standalone_ids = [add_prescription(db, patient).id for _ in range(3)]
+    recent_id = add_prescription(db, patient, created_at=datetime.utcnow()).id
+
+    assert archive_prescription_batch(db, CUTOFF, 2) == 2
+    assert archive_prescription_batch(db, CUTOFF, 2) == 1
+    assert archive_prescription_batch(db, CUTOFF, 2) == 0
+
+    assert sorted(p.id for p in db.query(ArchivedPrescription)) == standalone_ids
+    assert sorted(p.id for p in db.query(Prescription)) == [linked_id, recent_id]
+
+def test_run_archival_moves_all_batches(db):
+    patient = add_patient(db)
+    record_ids = [add_record(db, patient, date(2012, 1, day)).id for day in range(1, 6)]
+    add_prescription(db, patient)
+
+    moved = run_archival(horizon_days=(date.today() - CUTOFF).days, batch_size=2)
+
+    assert moved == {"records": 5, "prescriptions": 1}
+    assert db.query(MedicalRecord).count() == 0
+    assert sorted(r.id for r in db.query(ArchivedMedicalRecord)) == record_ids
+
+def test_prepare_archive_tables_creates_missing_indexes(db):
+    for index in ARCHIVE_INDEXES:
+        index.drop(engine)
+
+    prepare_archive_tables()
+    prepare_archive_tables()
+
+    names = {i["name"] for t in ("medical_records", "prescriptions") for i in inspect(engine).get_indexes(t)}
+    assert {index.name for index in ARCHIVE_INDEXES} <= names
+
+def test_run_archival_rejects_invalid_batch_size(db):
+    with pytest.raises(ValueError):
+        run_archival(batch_size=0)
+
+def test_history_returns_paginated_archived_records(db):
+    patient = add_patient(db)
+    for year in range(2010, 2015):
+        add_record(db, patient, date(year, 1, 1))
+    add_record(db, patient, date.today(), created_at=datetime.utcnow())
+    while archive_record_batch(db, CUTOFF, 2):
+        pass
+
+    query = """
+        query ($email: String!) {
+            patientByEmail(email: $email) {
+                records { visitDate }
+                history(limit: 2, offset: 1) { visitDate }
+            }
+        }
+    """
+    result = schema.execute_sync(query, variable_values={"email": patient.email}, context_value={"db": db})
+
+    assert result.errors is None
+    data = result.data["patientByEmail"]
+    assert [r["visitDate"] for r in data["records"]] == [date.today().isoformat()]
+    assert [r["visitDate"] for r in data["history"]] == ["2013-01-01", "2012-01-01"]